@@ -2,18 +2,37 @@ from core.visualizer_request import VisualizerRequest, ChartType
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Union
 from enum import Enum
 import json
 import logging
+
+try:
+    import orjson as _json  # Faster drop-in for json.loads; raises a json.JSONDecodeError subclass
+except ImportError:
+    _json = json
+
+try:
+    import msgspec  # Optional: decodes and validates the action list in a single pass
+except ImportError:
+    msgspec = None
 from core.session_manager import SessionManager
 from core.llm_handler import LLMHandler
 from core.data_manager import DataManager
 from core.visualizer import Visualizer
 from interface.gui import GUI
+from utils.config import LLM_RESPONSE_MAX_BYTES
 
 logger = logging.getLogger(__name__)
 
+ANALYZER_PROMPT_FILES = (
+    "analyzer_introduction.txt",
+    "analyzer_database_explanation.txt",
+    "analyzer_actions_explanation.txt",
+    "analyzer_actions_restrictions.txt",
+)
+SCHEMA_PROMPT_FILE = "schema_description.txt"
+
 class ActionType(Enum):
     PRINT_MESSAGE = "print_message"
     NAME_COHORT = "name_cohort"
@@ -22,11 +41,72 @@ class ActionType(Enum):
     SHOW_STATISTICS = "show_statistics"
     SUGGESTION = "suggestion"
 
+# Plain dict lookup is much cheaper than ActionType(value) on every decoded action
+_ACTION_TYPES_BY_VALUE = {action_type.value: action_type for action_type in ActionType}
+
+# Parameter checks per action type; types without an entry are rejected
+_PARAMETER_VALIDATORS: Dict[str, Callable[[Dict], bool]] = {
+    ActionType.PRINT_MESSAGE.value: lambda p: isinstance(p.get("message"), str),
+    ActionType.NAME_COHORT.value: lambda p: isinstance(p.get("name"), str),
+    ActionType.SAVE_COHORT.value: lambda p: isinstance(p.get("name"), str),
+    ActionType.CREATE_VISUALIZATION.value: lambda p: isinstance(p.get("request"), dict),
+    ActionType.SUGGESTION.value: lambda p: isinstance(p.get("message"), str) and isinstance(p.get("prompt"), str),
+}
+
+# Shared default for actions without "parameters"; only ever read, never mutated
+_EMPTY_PARAMETERS: Dict[str, Any] = {}
+
 @dataclass
 class Action:
+    # Explicit __slots__ (rather than dataclass(slots=True)) keeps Python < 3.10 support
+    __slots__ = ("type", "parameters")
     type: ActionType
     parameters: Dict[str, Any]
 
+if msgspec is not None:
+    # Typed schema mirroring _PARAMETER_VALIDATORS. Each action is tagged by its
+    # "type" field, so the decoder rejects unknown types and bad parameters itself.
+    # Handlers only read the parameters declared here, so undeclared parameter keys
+    # are dropped on this path (the validator path passes them through unread).
+    class _MessageParameters(msgspec.Struct):
+        message: str
+
+    class _NameParameters(msgspec.Struct):
+        name: str
+
+    class _VisualizationParameters(msgspec.Struct):
+        request: Dict[str, Any]
+
+    class _SuggestionParameters(msgspec.Struct):
+        message: str
+        prompt: str
+
+    class _PrintMessageMsg(msgspec.Struct, tag="print_message"):
+        parameters: _MessageParameters
+
+    class _NameCohortMsg(msgspec.Struct, tag="name_cohort"):
+        parameters: _NameParameters
+
+    class _SaveCohortMsg(msgspec.Struct, tag="save_cohort"):
+        parameters: _NameParameters
+
+    class _CreateVisualizationMsg(msgspec.Struct, tag="create_visualization"):
+        parameters: _VisualizationParameters
+
+    class _SuggestionMsg(msgspec.Struct, tag="suggestion"):
+        parameters: _SuggestionParameters
+
+    _MSG_ACTION_TYPES = {
+        _PrintMessageMsg: ActionType.PRINT_MESSAGE,
+        _NameCohortMsg: ActionType.NAME_COHORT,
+        _SaveCohortMsg: ActionType.SAVE_COHORT,
+        _CreateVisualizationMsg: ActionType.CREATE_VISUALIZATION,
+        _SuggestionMsg: ActionType.SUGGESTION,
+    }
+    _ACTION_DECODER = msgspec.json.Decoder(List[Union[tuple(_MSG_ACTION_TYPES)]])
+else:
+    _ACTION_DECODER = None
+
 class ActionManager:
     def __init__(self, llm_handler: LLMHandler, session_manager: SessionManager, data_manager: DataManager, visualizer: Visualizer, gui: GUI):
         self.actions: List[Action] = []
@@ -35,185 +115,167 @@ class ActionManager:
         self.data_manager = data_manager
         self.visualizer = visualizer
         self.gui = gui
+        # Prompt files are static, so read them once instead of on every LLM turn
+        self._prompts: Dict[str, str] = {
+            filename: self._load_prompt(filename)
+            for filename in (*ANALYZER_PROMPT_FILES, SCHEMA_PROMPT_FILE)
+        }
+        # Only the schema message changes between turns; the others are built once
+        self._static_system_messages = tuple(
+            {"role": "system", "content": self._prompts[filename]}
+            for filename in ANALYZER_PROMPT_FILES
+        )
         
         logger.debug("ActionManager initialized")
         
-    def decode_llm_response_old(self, json_str: str) -> bool:
-        """
-        Decode LLM JSON response and create corresponding actions
-        """
-        logger.debug(f"Starting to decode LLM response: {json_str[:100]}...")
-        try:
-            actions_data = json.loads(json_str)
-            logger.debug(f"JSON successfully parsed, got {type(actions_data)}")
-            
-            if not isinstance(actions_data, list):
-                logger.error(f"LLM response must be a list, got {type(actions_data)}")
-                return False
-                
-            logger.debug(f"Found {len(actions_data)} actions to process")
-            
-            # Clear existing actions before adding new ones
-            self.actions.clear()
-            logger.debug("Cleared existing actions")
-            
-            # Validate and create each action
-            for i, action_data in enumerate(actions_data):
-                logger.debug(f"Processing action {i+1}/{len(actions_data)}: {action_data.get('type', 'unknown')}")
-                if not self._validate_and_add_action(action_data):
-                    logger.error(f"Validation failed for action {i+1}")
-                    self.actions.clear()
-                    return False
-                    
-            logger.debug(f"Successfully processed all {len(self.actions)} actions")
-            return True
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
-            logger.debug(f"Problematic JSON string: {json_str}")
-            return False
-        except Exception as e:
-            logger.error(f"Unexpected error during decoding: {e}")
-            return False
-
     def decode_llm_response(self, json_str: str) -> bool:
         """
         Decode LLM JSON response and create corresponding actions.
         Handles cases where JSON is embedded within other text.
         """
-        logger.debug(f"Starting to decode LLM response: {json_str[:100]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Starting to decode LLM response: %s...", json_str[:100])
         try:
             # Check if response is empty or None
             if not json_str or not json_str.strip():
                 logger.error("Received empty LLM response")
                 return False
 
+            # Scanning bytes avoids per-character stepping over wide str storage,
+            # and both parsers accept the bytes slice without decoding it back.
+            json_bytes = json_str.encode('utf-8') if isinstance(json_str, str) else json_str
+
+            # Bound parse time and memory regardless of what the LLM sends back
+            if len(json_bytes) > LLM_RESPONSE_MAX_BYTES:
+                logger.error(f"LLM response too large: {len(json_bytes)} bytes (limit {LLM_RESPONSE_MAX_BYTES})")
+                return False
+
             # Find the first '[' and last ']' to extract JSON array
-            start_idx = json_str.find('[')
-            end_idx = json_str.rfind(']')
+            start_idx = json_bytes.find(b'[')
+            end_idx = json_bytes.rfind(b']')
             
             if start_idx == -1 or end_idx == -1:
                 logger.error("No JSON array found in response")
-                logger.debug(f"Response content: {json_str}")
+                logger.debug("Response content: %s", json_str)
                 return False
                 
             # Extract the JSON part
-            json_content = json_str[start_idx:end_idx + 1]
-            logger.debug(f"Extracted JSON content: {json_content[:100]}...")
+            json_content = json_bytes[start_idx:end_idx + 1]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Extracted JSON content: %s...", json_content[:100])
             
-            # Parse the JSON
-            actions_data = json.loads(json_content)
-            logger.debug(f"JSON successfully parsed, got {type(actions_data)}")
-            
-            if not isinstance(actions_data, list):
-                logger.error(f"LLM response must be a list, got {type(actions_data)}")
-                return False
-                
-            logger.debug(f"Found {len(actions_data)} actions to process")
-            
-            # Clear existing actions before adding new ones
-            self.actions.clear()
-            logger.debug("Cleared existing actions")
-            
-            # Validate and create each action
-            for i, action_data in enumerate(actions_data):
-                logger.debug(f"Processing action {i+1}/{len(actions_data)}: {action_data.get('type', 'unknown')}")
-                if not self._validate_and_add_action(action_data):
-                    logger.error(f"Validation failed for action {i+1}")
-                    self.actions.clear()
-                    return False
-                    
-            logger.debug(f"Successfully processed all {len(self.actions)} actions")
-            return True
+            if _ACTION_DECODER is not None:
+                return self._decode_with_schema(json_content)
+            return self._decode_with_validators(json_content)
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
-            logger.debug(f"Problematic JSON string: {json_content if 'json_content' in locals() else json_str}")
+            logger.debug("Problematic JSON string: %s", json_content if 'json_content' in locals() else json_str)
             return False
         except Exception as e:
             logger.error(f"Unexpected error during decoding: {e}")
             return False
 
+    def _decode_with_validators(self, json_content: bytes) -> bool:
+        """Parse the action list and validate each action with the per-type validators"""
+        # Parse the JSON
+        actions_data = _json.loads(json_content)
+        logger.debug("JSON successfully parsed, got %s", type(actions_data))
+        
+        if not isinstance(actions_data, list):
+            logger.error(f"LLM response must be a list, got {type(actions_data)}")
+            return False
             
-    def _validate_and_add_action(self, action_data: Dict) -> bool:
-        """Validate single action and add if valid"""
-        try:
-            logger.debug(f"Validating action data: {action_data}")
-            
-            # Validate basic structure
-            if not isinstance(action_data, dict):
-                logger.error(f"Action must be a dictionary, got {type(action_data)}")
+        logger.debug("Found %s actions to process", len(actions_data))
+        
+        # Validate into a fresh, presized list; pending actions are only replaced if all of them pass
+        new_actions: List[Optional[Action]] = [None] * len(actions_data)
+        for i, action_data in enumerate(actions_data):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing action %d/%d: %s", i + 1, len(actions_data), action_data.get('type', 'unknown'))
+            action = self._build_action(action_data)
+            if action is None:
+                logger.error(f"Validation failed for action {i+1}")
                 return False
+            new_actions[i] = action
                 
-            action_type = action_data.get("type")
-            parameters = action_data.get("parameters", {})
+        self.actions[:] = new_actions
+        logger.debug("Successfully processed all %s actions", len(self.actions))
+        return True
+
+    def _decode_with_schema(self, json_content: bytes) -> bool:
+        """Decode and validate the action list in one pass using the msgspec schema"""
+        try:
+            messages = _ACTION_DECODER.decode(json_content)
+        except msgspec.DecodeError as e:
+            # ValidationError is a DecodeError subclass, so this covers schema mismatches too
+            logger.error(f"Invalid LLM response: {e}")
+            logger.debug("Problematic JSON string: %s", json_content)
+            return False
+
+        self.actions[:] = [
+            Action(
+                type=_MSG_ACTION_TYPES[type(message)],
+                parameters=msgspec.structs.asdict(message.parameters)
+            )
+            for message in messages
+        ]
+        logger.debug("Successfully processed all %s actions", len(self.actions))
+        return True
             
-            logger.debug(f"Action type: {action_type}, Parameters: {parameters}")
+    def _build_action(self, action_data: Dict) -> Optional[Action]:
+        """Validate single action and return it, or None if invalid"""
+        try:
+            logger.debug("Validating action data: %s", action_data)
             
-            if not action_type:
-                logger.error("Missing action type")
-                return False
+            # Validate basic structure: non-dicts raise TypeError/AttributeError, a missing type
+            # KeyError; non-string types are rejected by the type lookup below
+            try:
+                action_type = action_data["type"]
+                parameters = action_data.get("parameters", _EMPTY_PARAMETERS)
+            except (KeyError, TypeError, AttributeError):
+                logger.error(f"Action must be a dictionary with a string type, got {action_data!r}")
+                return None
+            
+            # Reject unknown types before looking at the (possibly large) parameters payload
+            action_enum = _ACTION_TYPES_BY_VALUE.get(action_type)
+            if action_enum is None:
+                logger.error(f"Invalid action type: {action_type}")
+                return None
                 
-            if not isinstance(parameters, dict):
-                logger.error(f"Parameters must be a dictionary, got {type(parameters)}")
-                return False
+            logger.debug("Action type: %s, Parameters: %s", action_type, parameters)
                 
-            # Validate specific action types
-            logger.debug(f"Validating parameters for action type: {action_type}")
+            # Validate specific action types (non-dict parameters are rejected there)
+            logger.debug("Validating parameters for action type: %s", action_type)
             if not self._validate_action_parameters(action_type, parameters):
                 logger.error(f"Parameter validation failed for action type: {action_type}")
-                return False
+                return None
                 
-            # Create and add action
-            try:
-                action = Action(
-                    type=ActionType(action_type),
-                    parameters=parameters
-                )
-                logger.debug(f"Created action object: {action}")
-                self.actions.append(action)
-                return True
-            except ValueError as e:
-                logger.error(f"Invalid action type: {action_type}")
-                return False
+            # Create action
+            action = Action(type=action_enum, parameters=parameters)
+            logger.debug("Created action object: %s", action)
+            return action
                 
         except Exception as e:
             logger.error(f"Error in action validation: {e}")
-            return False
+            return None
             
     def _validate_action_parameters(self, action_type: str, parameters: Dict) -> bool:
         """Validate parameters for specific action type"""
-        logger.debug(f"Validating parameters for {action_type}: {parameters}")
+        logger.debug("Validating parameters for %s: %s", action_type, parameters)
         try:
-            if action_type == "print_message":
-                valid = isinstance(parameters.get("message"), str)
-                logger.debug(f"print_message validation: {valid}")
-                return valid
-                
-            elif action_type == "name_cohort":
-                valid = isinstance(parameters.get("name"), str)
-                logger.debug(f"name_cohort validation: {valid}")
-                return valid
-                
-            elif action_type == "save_cohort":
-                valid = isinstance(parameters.get("name"), str)
-                logger.debug(f"save_cohort validation: {valid}")
-                return valid
-                
-            elif action_type == "create_visualization":
-                request = parameters.get("request")
-                valid = isinstance(request, dict)
-                logger.debug(f"create_visualization validation: {valid}")
-                return valid
+            validator = _PARAMETER_VALIDATORS.get(action_type)
+            if validator is None:
+                logger.error(f"Unknown action type: {action_type}")
+                return False
                 
-            elif action_type == "suggestion":
-                valid = (isinstance(parameters.get("message"), str) and
-                        isinstance(parameters.get("prompt"), str))
-                logger.debug(f"suggestion validation: {valid}")
-                return valid
+            if not isinstance(parameters, dict):
+                logger.error(f"Parameters must be a dictionary, got {type(parameters)}")
+                return False
                 
-            logger.error(f"Unknown action type: {action_type}")
-            return False
+            valid = validator(parameters)
+            logger.debug("%s validation: %s", action_type, valid)
+            return valid
             
         except Exception as e:
             logger.error(f"Error in parameter validation: {e}")
@@ -221,7 +283,7 @@ class ActionManager:
 
     def get_pending_actions_count(self) -> int:
         """Get number of pending actions"""
-        logger.debug(f"Getting count of pending actions: {len(self.actions)}")
+        logger.debug("Getting count of pending actions: %s", len(self.actions))
         return len(self.actions)
 
     def get_llm_response(self) -> bool:
@@ -241,36 +303,18 @@ class ActionManager:
             # Get current schema
             formatted_schema = self.data_manager.get_readable_schema_current_cohort()
             
-            # Create system messages with analyzer prompts and schema
-            system_messages = [
-                {
-                    "role": "system",
-                    "content": self._load_prompt("analyzer_introduction.txt")
-                },
-                {
-                    "role": "system",
-                    "content": self._load_prompt("analyzer_database_explanation.txt")
-                },
-                {
-                    "role": "system",
-                    "content": self._load_prompt("analyzer_actions_explanation.txt")
-                },
-                {
-                    "role": "system",
-                    "content": self._load_prompt("analyzer_actions_restrictions.txt")
-                },
-                {
-                    "role": "system",
-                    "content": f"{self._load_prompt('schema_description.txt')}\n{formatted_schema}"
-                }
-            ]
+            # Schema message is the only system message that depends on the current cohort
+            schema_message = {
+                "role": "system",
+                "content": f"{self._prompts[SCHEMA_PROMPT_FILE]}\n{formatted_schema}"
+            }
             
             # Get conversation history from session manager
-            conversation_messages = self.session_manager.get_messages()
+            conversation_messages = self.session_manager.get_messages_view()
             
-            # Combine system messages with conversation history
-            all_messages = system_messages + conversation_messages
-            logger.debug(f"Prepared {len(all_messages)} messages for LLM")
+            # Combine system messages with conversation history in a single list build
+            all_messages = [*self._static_system_messages, schema_message, *conversation_messages]
+            logger.debug("Prepared %s messages for LLM", len(all_messages))
             
             # Get response from LLM
             llm_response = self.llm_handler.send_chat_request(all_messages)
@@ -304,22 +348,23 @@ class ActionManager:
             print("No pending actions")
             return
 
-        print("\nPending Actions:")
-        print("---------------")
+        # Collect all lines and print once instead of once per parameter
+        lines = ["\nPending Actions:", "---------------"]
         
         for i, action in enumerate(self.actions, 1):
-            print(f"\n{i}. Type: {action.type.value}")
-            print("   Parameters:")
+            lines.append(f"\n{i}. Type: {action.type.value}")
+            lines.append("   Parameters:")
             for key, value in action.parameters.items():
                 # Handle nested dictionaries (like in create_visualization)
                 if isinstance(value, dict):
-                    print(f"   - {key}:")
+                    lines.append(f"   - {key}:")
                     for sub_key, sub_value in value.items():
-                        print(f"     * {sub_key}: {sub_value}")
+                        lines.append(f"     * {sub_key}: {sub_value}")
                 else:
-                    print(f"   - {key}: {value}")
+                    lines.append(f"   - {key}: {value}")
         
-        print("\nTotal actions:", len(self.actions))
+        lines.append(f"\nTotal actions: {len(self.actions)}")
+        print("\n".join(lines))
 
     def execute_actions(self) -> None:
         """
@@ -336,29 +381,32 @@ class ActionManager:
         viz_counter = 0
 
         for action in self.actions:
+            # Bind once; each branch below reads from these instead of re-loading the attributes
+            action_type = action.type
+            parameters = action.parameters
             try:
-                if action.type == ActionType.PRINT_MESSAGE:
-                    message = action.parameters.get("message")
+                if action_type == ActionType.PRINT_MESSAGE:
+                    message = parameters.get("message")
                     if message:
                         self.display_text(message)
                     else:
                         self.display_text("Found empty message action")
                 
-                elif action.type == ActionType.SAVE_COHORT:
+                elif action_type == ActionType.SAVE_COHORT:
                     path = self.session_manager.get_current_session_path()
-                    name = action.parameters.get("name", "test")
+                    name = parameters.get("name", "test")
                     self.data_manager.save_current_cohort(path, name)
                     full_path = path / name / ".csv"
                     self.gui.add_file_to_panel(full_path, type="database")
                     self.display_text("Saved current cohort")
                     
 
-                elif action.type == ActionType.CREATE_VISUALIZATION:
+                elif action_type == ActionType.CREATE_VISUALIZATION:
                     viz_counter += 1
                     self._handle_visualization_action(action, viz_counter)
                     
-                elif action.type == ActionType.SUGGESTION:
-                    suggestion_message = action.parameters.get("message")
+                elif action_type == ActionType.SUGGESTION:
+                    suggestion_message = parameters.get("message")
                     if suggestion_message is None:
                         logger.error("Suggestion message is missing")
                         continue
@@ -367,7 +415,7 @@ class ActionManager:
                         self.session_manager.add_llm_response(suggestion_message)
 
             except Exception as e:
-                logger.error(f"Error executing action {action.type}: {e}")
+                logger.error(f"Error executing action {action_type}: {e}")
                 self.display_text(f"Error executing action: {str(e)}")
 
         # Clear processed actions
@@ -7,11 +7,17 @@ from interface.gui import GUI
 from utils.config import (
     DATA_DIR,
     LOG_LEVEL,
+    PREPARSER_CACHE_FILE,
+    PROJECT_ROOT,
+    TESTS_DIR,
+    TEXT_OUTPUT_MAX_BYTES,
 )
 
-import pytest
 import os
-from typing import Dict, Any, Optional, List
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 from interface.cli import HealthcareCLI
 from core.preparser import Preparser
 from core.parser import Parser
@@ -26,44 +32,106 @@ from core.visualizer import Visualizer
 from core.action_manager import ActionManager
 
 
+# Prefix symbols for the different text_output message types
+_MESSAGE_PREFIXES = {
+    "info": "ℹ️",
+    "error": "❌",
+    "warning": "⚠️",
+    "success": "✅"
+}
+# Message types logged above info level; anything else is logged with logger.info
+_MESSAGE_LOG_FUNCTIONS = {
+    "error": logger.error,
+    "warning": logger.warning,
+}
+
+# Test function definitions; indentation is allowed because several test modules group tests in classes
+_TEST_FUNCTION_RE = re.compile(rb'^\s*(?:async\s+)?def\s+(test_\w+)\s*\(', re.M)
+
+
+@lru_cache(maxsize=32)
+def _read_text_file(file_path: str) -> str:
+    """
+    Read a static text file (help/unknown-intention messages), reading at most
+    TEXT_OUTPUT_MAX_BYTES. Contents are cached, so repeated requests skip the disk.
+    """
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        data = file.read(min(size, TEXT_OUTPUT_MAX_BYTES))
+    if size > TEXT_OUTPUT_MAX_BYTES:
+        logger.warning(f"{file_path} is {size} bytes, output truncated to {TEXT_OUTPUT_MAX_BYTES}")
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+
 class Application:
     """
     Application service layer that coordinates between different components.
     """
+    # Intentions answered by printing a prompt file instead of running a query
+    _INTENTION_FILES: Dict[IntentionType, str] = {
+        IntentionType.HELP: str(PROJECT_ROOT / "prompts" / "help_message.txt"),
+        IntentionType.UNKNOWN: str(PROJECT_ROOT / "prompts" / "unknown_intention_message.txt"),
+    }
+
     def __init__(self):
         logger.setLevel(LOG_LEVEL)
         logger.info("Initializing Application")
         self.preparser = Preparser()
-        self.llm_handler = LLMHandler()
-        self.data_manager = DataManager(DATA_DIR)
-        self.parser = Parser(self.llm_handler, self.data_manager)
-        self.query_manager = QueryManager(self.data_manager)
         self.cli = HealthcareCLI(self)
         self.result_analyzer = ResultAnalyzer()
         self.visualizer = Visualizer()
         self.session_manager = SessionManager()
-        self.intention_executer = IntentionExecutor(self.query_manager, self.visualizer, self.data_manager)
+        # Test file path -> (mtime, test function names), so unchanged files are not re-parsed
+        self._test_functions_cache: Dict[str, Tuple[int, List[str]]] = {}
+        # (tests directory mtime, test file names), refreshed when files are added or removed
+        self._available_tests_cache: Optional[Tuple[int, List[str]]] = None
+        # Background load of the DataManager, started by start()
+        self._data_manager_future: Optional["Future[DataManager]"] = None
+        
+    # Components below are built on first use: loading the data and connecting to the
+    # LLM are only paid for by sessions that handle queries, not by test commands.
+    @cached_property
+    def llm_handler(self) -> LLMHandler:
+        return LLMHandler()
+
+    @cached_property
+    def data_manager(self) -> DataManager:
+        # start() begins loading in the background; wait for that load instead of repeating it
+        if self._data_manager_future is not None:
+            return self._data_manager_future.result()
+        return DataManager(DATA_DIR)
+
+    @cached_property
+    def parser(self) -> Parser:
+        return Parser(self.llm_handler, self.data_manager)
+
+    @cached_property
+    def query_manager(self) -> QueryManager:
+        return QueryManager(self.data_manager)
+
+    @cached_property
+    def intention_executer(self) -> IntentionExecutor:
+        return IntentionExecutor(self.query_manager, self.visualizer, self.data_manager)
+
+    @cached_property
+    def action_manager(self) -> ActionManager:
+        return ActionManager(self.llm_handler, self.session_manager, self.data_manager, self.visualizer, self.gui)
         
     def start(self):
         """Start the application and its interface."""
+        # Load the data while the GUI comes up; the first query waits for it if needed
+        loader = ThreadPoolExecutor(max_workers=1)
+        self._data_manager_future = loader.submit(DataManager, DATA_DIR)
+        loader.shutdown(wait=False)
+        
         self.gui = GUI()
-        self.action_manager = ActionManager(self.llm_handler, self.session_manager, self.data_manager, self.visualizer, self.gui)
 
         logger.info("Starting application")
         self.visualizer.clear_output_directory()
         
-        # Set up the callback
-        def handle_message(user_input):
-            self.process_user_input(user_input)
-            
-        self.gui.set_submit_callback(handle_message)
-        
-        # Start the GUI main loop
-        self.gui.root.mainloop()
-
-            
-        # Load existing or newly created cache to preparser
-        cache_path = "root/data/cache.json"
+        # Load existing or newly created cache to preparser before any input is handled.
+        # Lookups then stay in memory; the file is only written again on shutdown.
+        cache_path = str(PREPARSER_CACHE_FILE)
         if not os.path.exists(cache_path):
             logger.info("Cache file not found. Creating new cache.")
             try:
@@ -79,6 +147,16 @@ class Application:
         except IOError as e:
             logger.error(f"Failed to load cache: {e}")
             raise
+        
+        # Set up the callback
+        def handle_message(user_input):
+            self.process_user_input(user_input)
+            
+        self.gui.set_submit_callback(handle_message)
+        
+        # Start the GUI main loop
+        self.gui.root.mainloop()
+
         try:
             self.cli.cmdloop()
         except KeyboardInterrupt:
@@ -94,7 +172,7 @@ class Application:
     def shutdown(self):
         """Cleanup and shutdown application."""
         self.visualizer.clear_output_directory()
-        self.preparser.save_cache_to_file("root/data/cache.json")
+        self.preparser.save_cache_to_file(str(PREPARSER_CACHE_FILE))
         self.session_manager.wipe_session_folder()
         logger.info("Shutting down application")
         # Add cleanup code here if needed
@@ -121,14 +199,10 @@ class Application:
             else:
                 user_intention = preparse_result
             
-            if user_intention.intention_type == IntentionType.HELP:
-                # Print help from \root\prompts\help_message.txt
-                self.text_file_output("root/prompts/help_message.txt")
-                return
-                
-            elif user_intention.intention_type == IntentionType.UNKNOWN:
-                # Print help from root\prompts\unknown_intention_message.txt
-                self.text_file_output("root/prompts/unknown_intention_message.txt")
+            # Help and unknown intentions are answered with a static text file
+            intention_file = self._INTENTION_FILES.get(user_intention.intention_type)
+            if intention_file is not None:
+                self.text_file_output(intention_file)
                 return
 
             # This needs rework: old intension object is really only a query.                
@@ -148,37 +222,42 @@ class Application:
         Returns:
             List of test file names without .py extension
         """
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        tests_dir = os.path.join(project_root, 'tests')
+        tests_dir = str(TESTS_DIR)
         
         if not os.path.exists(tests_dir):
             logger.error(f"Tests directory not found at {tests_dir}")
             return []
             
-        test_files = [
-            f[5:-3] for f in os.listdir(tests_dir) 
-            if f.startswith('test_') and f.endswith('.py')
-        ]
-        return sorted(test_files)
+        # A directory's mtime changes whenever a file is added, removed or renamed
+        mtime = os.stat(tests_dir).st_mtime_ns
+        if self._available_tests_cache is not None and self._available_tests_cache[0] == mtime:
+            return list(self._available_tests_cache[1])
+            
+        with os.scandir(tests_dir) as entries:
+            test_files = sorted(
+                entry.name[5:-3] for entry in entries
+                if entry.name.startswith('test_') and entry.name.endswith('.py') and entry.is_file()
+            )
+        self._available_tests_cache = (mtime, test_files)
+        return list(test_files)
 
     def get_test_functions(self, test_file: str) -> List[str]:
         try:
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             test_file = test_file if test_file.startswith('test_') else f'test_{test_file}'
-            test_path = os.path.join(project_root, 'tests', f'{test_file}.py')
+            test_path = os.path.join(TESTS_DIR, f'{test_file}.py')
             
-            import ast
+            mtime = os.stat(test_path).st_mtime_ns
+            cached = self._test_functions_cache.get(test_path)
+            if cached is not None and cached[0] == mtime:
+                return list(cached[1])
             
-            with open(test_path, 'r') as file:
-                tree = ast.parse(file.read())
+            with open(test_path, 'rb') as file:
+                data = file.read()
                 
-            test_functions = [
-                node.name for node in ast.walk(tree)
-                if (isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef))
-                and node.name.startswith('test_')
-            ]
+            test_functions = sorted({match.group(1).decode() for match in _TEST_FUNCTION_RE.finditer(data)})
+            self._test_functions_cache[test_path] = (mtime, test_functions)
             
-            return sorted(test_functions)
+            return list(test_functions)
                 
         except Exception as e:
             logger.error(f"Error getting test functions: {e}")
@@ -186,8 +265,10 @@ class Application:
 
     def run_tests(self, test_file: Optional[str] = None, test_function: Optional[str] = None) -> Dict[str, Any]:
         try:
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            tests_dir = os.path.join(project_root, 'tests')
+            # Imported here: pytest is heavy and only needed when tests are actually run
+            import pytest
+            
+            tests_dir = str(TESTS_DIR)
 
             if not os.path.exists(tests_dir):
                 return {"success": False, "error": "Tests directory not found"}
@@ -244,27 +325,16 @@ class Application:
             message_type (str): Type of message. Can be "info", "error", "warning", or "success"
                             Used for different styling in future GUI implementation
         """
-        # Dictionary of prefix symbols for different message types
-        prefix_dict = {
-            "info": "ℹ️",
-            "error": "❌",
-            "warning": "⚠️",
-            "success": "✅"
-        }
+        message_type = message_type.lower()
         
         # Get prefix (default to info if message_type is not recognized)
-        prefix = prefix_dict.get(message_type.lower(), prefix_dict["info"])
+        prefix = _MESSAGE_PREFIXES.get(message_type, _MESSAGE_PREFIXES["info"])
         
         # For now, just print to console
         print(f"{prefix} {message}")
         
         # Log the message with appropriate level
-        if message_type.lower() == "error":
-            logger.error(message)
-        elif message_type.lower() == "warning":
-            logger.warning(message)
-        else:
-            logger.info(message)
+        _MESSAGE_LOG_FUNCTIONS.get(message_type, logger.info)(message)
 
     def text_file_output(self, file_path: str, message_type: str = "info") -> None:
         """
@@ -275,9 +345,8 @@ class Application:
             message_type (str): Type of message for formatting (default: "info")
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                self.text_output(content, message_type)
+            content = _read_text_file(file_path)
+            self.text_output(content, message_type)
         except FileNotFoundError:
             self.text_output(f"File not found at {file_path}", "error")
         except Exception as e:
@@ -1,18 +1,61 @@
 # core/data_manager.py
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Set
 import numpy as np
 import pandas as pd
 import os
 import glob
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # Optional: pandas' own CSV parser is used instead
+    pa = None
 from utils.logger import logger
 from utils.logger import setup_logger
 from core.query import Query
 from core.visualizer_request import VisualizerRequest, ChartType
-from utils.config import PATIENT_ID_COLUMN, PATIENT_ID_ALTERNATIVES, UNIQUE_VALUES_THRESHOLD
+from utils.config import CSV_CACHE_DIRNAME, CSV_READ_WORKERS, PATIENT_ID_COLUMN, PATIENT_ID_ALTERNATIVES, UNIQUE_VALUES_THRESHOLD
 
 logger = setup_logger(__name__)
 
+# Part of every CSV cache file name; bump it when _read_csv output changes so old entries are dropped
+_CSV_CACHE_VERSION = 2
+
+def _arrow_string_types() -> Dict[Any, Any]:
+    """
+    Map Arrow string types to pandas' Arrow-backed string dtype. Its NaN missing
+    value keeps comparison results plain numpy bools, usable as row masks.
+    Without pyarrow, or with pandas < 2.3 (no na_value argument), text columns stay object.
+    """
+    if pa is None:
+        return {}
+    try:
+        string_dtype = pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        logger.info("pandas < 2.3: text columns are loaded as object dtype")
+        return {}
+    return {arrow_type: string_dtype for arrow_type in (pa.string(), pa.large_string())}
+
+_ARROW_STRING_TYPES = _arrow_string_types()
+
+# The right side of an AND/OR is evaluated only on the rows its left side leaves
+# undecided once they are at most this fraction of the frame
+_NARROWED_QUERY_MAX_FRACTION = 0.25
+
+# Patient ID column names, in order of preference
+_PATIENT_ID_KEYS = (PATIENT_ID_COLUMN, *PATIENT_ID_ALTERNATIVES)
+
+# Columns shared by all tables to join them; they are never prefixed with the table name
+_JOIN_KEYS = frozenset(_PATIENT_ID_KEYS)
+
+def _is_numeric_column(column: pd.Series) -> bool:
+    """Numeric columns get min/max/mean in the schema; booleans do not."""
+    return pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column)
+
 class DataManager:
     """
     Centralized data management component for clinical datasets.
@@ -30,10 +73,15 @@ class DataManager:
             ValueError: If data loading fails
         """
         self._data_path = data_path
+        self._cache_dir = os.path.join(data_path, CSV_CACHE_DIRNAME)
         self._full_dataset: Optional[pd.DataFrame] = None
+        # Starts as the full dataset itself, not a copy: the cohort is never modified
+        # in place, only replaced by filtered frames, so it must stay that way
         self._current_cohort: Optional[pd.DataFrame] = None
+        self._patient_id_col: Optional[str] = None  # Patient ID column of the merged dataset
         self._full_schema: Dict[str, Dict] = {}  # Schema for full dataset
-        self._current_schema: Dict[str, Dict] = {}  # Schema for current cohort
+        self._current_schema: Optional[Dict[str, Dict]] = None  # Schema for current cohort, built on first use
+        self._current_schema_text: Optional[str] = None  # Formatted current schema, rebuilt lazily
         
         # Automatically load data on initialization
         if not self.load_csv_files():
@@ -41,7 +89,6 @@ class DataManager:
             
         # Initialize full dataset schema
         self._update_full_schema()
-        self._update_current_schema()
 
     def load_csv_files(self) -> bool:
         """
@@ -55,22 +102,28 @@ class DataManager:
                 logger.error(f"No CSV files found in {self._data_path}")
                 return False
                 
-            dataframes = {}
-            for file in csv_files:
-                logger.debug(f"Reading {file}")
-                table_name = os.path.splitext(os.path.basename(file))[0]
-                df = pd.read_csv(file)
-                df = self._prefix_columns(df, table_name)
-                dataframes[table_name] = df
-                logger.debug(f"Loaded {table_name} with columns: {df.columns.tolist()}")
-                
-            self._full_dataset = self._merge_dataframes(dataframes)
+            table_names = [os.path.splitext(os.path.basename(file))[0] for file in csv_files]
+            cache_files = [self._csv_cache_file(file, table_name) for file, table_name in zip(csv_files, table_names)]
+            # The merged dataset is cached as well, under a key built from all the file entries
+            merged_cache_file = self._merged_cache_file(cache_files)
+            
+            self._full_dataset = self._read_merged_cache(merged_cache_file)
             if self._full_dataset is None:
-                logger.error("Merge resulted in None DataFrame")
-                return False
+                self._full_dataset = self._read_and_merge_csv_files(csv_files, table_names, cache_files)
+                if self._full_dataset is None:
+                    logger.error("Merge resulted in None DataFrame")
+                    return False
+                # The merged rows repeat every joined value, so this entry is compressed
+                self._write_cache_file_safely(self._full_dataset, merged_cache_file, compression="zstd")
+            self._remove_stale_csv_cache(set(cache_files) | {merged_cache_file})
+            
+            # Cohorts keep the columns of the full dataset, so the ID column is looked up once
+            self._patient_id_col = next((col for col in _PATIENT_ID_KEYS if col in self._full_dataset.columns), None)
                 
-            logger.debug(f"Final merged dataset columns: {self._full_dataset.columns.tolist()}")
-            self._current_cohort = self._full_dataset.copy()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Final merged dataset columns: %s", self._full_dataset.columns.tolist())
+            self._current_cohort = self._full_dataset
+            self._invalidate_current_schema()
             logger.info(f"Successfully loaded {len(csv_files)} files")
             return True
             
@@ -78,19 +131,187 @@ class DataManager:
             logger.error(f"Error loading CSV files: {str(e)}")
             return False
 
-    def _prefix_columns(self, df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    def _read_and_merge_csv_files(self, csv_files: List[str], table_names: List[str],
+                                  cache_files: List[str]) -> Optional[pd.DataFrame]:
+        """Read every CSV file (or its cache entry) and merge them into the full dataset."""
+        # Parsers release the GIL, so files are read concurrently; map keeps the file order
+        with ThreadPoolExecutor(max_workers=min(CSV_READ_WORKERS, len(csv_files))) as executor:
+            results = list(executor.map(self._read_csv_cached, csv_files, table_names, cache_files))
+            
+        dataframes = {}
+        for table_name, df in zip(table_names, results):
+            df = self._prefix_columns(df, table_name)
+            dataframes[table_name] = df
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Loaded %s with columns: %s", table_name, df.columns.tolist())
+                
+        merged = self._merge_dataframes(dataframes)
+        if merged is not None:
+            self._downcast_integer_columns(merged)
+        return merged
+
+    def _csv_cache_file(self, file: str, table_name: str) -> str:
         """
-        Add table name prefix to column names except join keys.
+        Path of the cache entry for a CSV file. It is keyed by the file's mtime and
+        size and by the cache version, so a changed file never hits an old entry.
+        """
+        stat = os.stat(file)
+        cache_suffix = ".arrow" if pa is not None else ".pkl"
+        return os.path.join(
+            self._cache_dir, f"{table_name}-{stat.st_mtime_ns}-{stat.st_size}-v{_CSV_CACHE_VERSION}{cache_suffix}"
+        )
+
+    def _merged_cache_file(self, cache_files: List[str]) -> str:
+        """
+        Path of the cache entry for the merged dataset. Its key hashes the entries of
+        all input files in merge order, so any added, removed or changed file misses.
+        """
+        key = hashlib.blake2b("\n".join(map(os.path.basename, cache_files)).encode(), digest_size=16).hexdigest()
+        return os.path.join(self._cache_dir, f"merged-{key}{os.path.splitext(cache_files[0])[1]}")
+
+    def _read_merged_cache(self, merged_cache_file: str) -> Optional[pd.DataFrame]:
+        """Load the cached merged dataset, or return None if there is no usable entry."""
+        if not os.path.exists(merged_cache_file):
+            return None
+        try:
+            df = self._read_cache_file(merged_cache_file)
+            logger.debug(f"Loaded merged dataset from cache {merged_cache_file}")
+            return df
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache {merged_cache_file}: {e}")
+            return None
+
+    def _read_csv_cached(self, file: str, table_name: str, cache_file: str) -> pd.DataFrame:
         """
-        prefixed_columns = {}
-        join_keys = [PATIENT_ID_COLUMN] + PATIENT_ID_ALTERNATIVES
+        Read a CSV file, reusing the DataFrame cached by a previous run at
+        cache_file if the file is unchanged.
+        """
+        logger.debug(f"Reading {file}")
+        if os.path.exists(cache_file):
+            try:
+                df = self._read_cache_file(cache_file)
+                logger.debug(f"Loaded {table_name} from cache {cache_file}")
+                return df
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache {cache_file}: {e}")
+        
+        df = self._read_csv(file)
+        self._write_cache_file_safely(df, cache_file)
+        return df
+
+    def _write_cache_file_safely(self, df: pd.DataFrame, cache_file: str, compression: Optional[str] = None) -> None:
+        """Write a cache entry, logging instead of failing if it cannot be written."""
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            self._write_cache_file(df, cache_file, compression)
+        except Exception as e:
+            # Caching is only an optimisation; a read-only data directory must still load
+            logger.warning(f"Could not write cache {cache_file}: {e}")
+
+    def _read_cache_file(self, cache_file: str) -> pd.DataFrame:
+        """
+        Load a cached table. Arrow IPC files are memory-mapped, so the table is
+        built straight from the page cache instead of being copied and unpickled.
+        """
+        if cache_file.endswith(".pkl"):
+            return pd.read_pickle(cache_file)
+        with pa.memory_map(cache_file, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return self._arrow_to_pandas(table)
+
+    def _write_cache_file(self, df: pd.DataFrame, cache_file: str, compression: Optional[str] = None) -> None:
+        """
+        Write a table in the cache format matching its file suffix. The entry is written
+        to a temporary file and renamed into place, so a crash or a concurrent loader
+        never leaves a truncated file under a name that counts as a cache hit.
+        compression (e.g. "zstd") applies to Arrow entries; readers detect it themselves.
+        """
+        # Dot-prefixed, so the "*" glob in _remove_stale_csv_cache skips in-flight writes
+        tmp = tempfile.NamedTemporaryFile(dir=self._cache_dir, prefix=".tmp-", delete=False)
+        try:
+            with tmp:
+                if cache_file.endswith(".pkl"):
+                    df.to_pickle(tmp)
+                else:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    options = pa.ipc.IpcWriteOptions(compression=compression)
+                    with pa.ipc.new_file(tmp, table.schema, options=options) as writer:
+                        writer.write_table(table)
+            os.replace(tmp.name, cache_file)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+
+    def _read_csv(self, file: str) -> pd.DataFrame:
+        """
+        Parse a CSV file, using pyarrow's multithreaded reader when it is installed.
+        The result matches pd.read_csv: dates stay strings and missing strings are NaN.
+        """
+        if pa is None:
+            return pd.read_csv(file)
         
-        for col in df.columns:
-            if col not in join_keys:  # If not a join key
-                if not col.startswith(f"{table_name}."):  # If not already prefixed
-                    prefixed_columns[col] = f"{table_name}.{col}"
+        table = pa_csv.read_csv(file, convert_options=pa_csv.ConvertOptions(
+            timestamp_parsers=[], strings_can_be_null=True
+        ))
+        # Arrow still infers ISO timestamps; casting them back would not reproduce the
+        # original text, so those columns are read again as plain strings
+        timestamp_columns = [field.name for field in table.schema if pa.types.is_timestamp(field.type)]
+        if timestamp_columns:
+            table = pa_csv.read_csv(file, convert_options=pa_csv.ConvertOptions(
+                timestamp_parsers=[], strings_can_be_null=True,
+                column_types={name: pa.string() for name in timestamp_columns}
+            ))
+        # Plain dates are turned back into the original ISO strings
+        for i, field in enumerate(table.schema):
+            if pa.types.is_date(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        return self._arrow_to_pandas(table)
+
+    def _arrow_to_pandas(self, table: "pa.Table") -> pd.DataFrame:
+        """
+        Convert an Arrow table to the DataFrame pd.read_csv would have produced,
+        except that text columns stay Arrow-backed strings instead of Python objects.
+        Filters on them (equals, in, contains) then run Arrow's vectorized kernels.
+        """
+        df = table.to_pandas(types_mapper=_ARROW_STRING_TYPES.get)
         
-        return df.rename(columns=prefixed_columns)
+        # Arrow nulls in any remaining object columns come back as None where pd.read_csv gives NaN
+        object_columns = df.columns[df.dtypes == object]
+        if len(object_columns):
+            df[object_columns] = df[object_columns].fillna(np.nan)
+        return df
+
+    def _remove_stale_csv_cache(self, keep: Set[str]) -> None:
+        """Delete cache entries of CSV files that changed or no longer exist."""
+        for cache_file in glob.glob(os.path.join(self._cache_dir, "*")):
+            if cache_file not in keep:
+                try:
+                    os.remove(cache_file)
+                    logger.debug(f"Removed stale cache {cache_file}")
+                except OSError as e:
+                    logger.warning(f"Could not remove stale cache {cache_file}: {e}")
+
+    def _downcast_integer_columns(self, df: pd.DataFrame) -> None:
+        """
+        Store integer columns in the narrowest integer dtype that holds their values,
+        so cohort filters scan less memory. Float columns keep float64: they carry
+        codes (e.g. SNOMED) too large to survive float32.
+        """
+        for column in df.select_dtypes(include="integer").columns:
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+
+    def _prefix_columns(self, df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+        """
+        Add table name prefix to column names except join keys.
+        The labels are replaced in place: rename() would also copy every column
+        of the freshly read table.
+        """
+        prefix = f"{table_name}."
+        df.columns = [
+            col if col in _JOIN_KEYS or col.startswith(prefix) else prefix + col
+            for col in df.columns
+        ]
+        return df
 
     def _merge_dataframes(self, dataframes: Dict[str, pd.DataFrame]) -> Optional[pd.DataFrame]:
         """
@@ -105,22 +326,18 @@ class DataManager:
         
         if 'pacientes' in remaining_dfs:
             result = remaining_dfs.pop('pacientes')
-            logger.debug(f"Starting merge with pacientes table, columns: {result.columns.tolist()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Starting merge with pacientes table, columns: %s", result.columns.tolist())
         else:
             first_table = list(remaining_dfs.keys())[0]
             result = remaining_dfs.pop(first_table)
-            logger.debug(f"Starting merge with {first_table} table, columns: {result.columns.tolist()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Starting merge with %s table, columns: %s", first_table, result.columns.tolist())
         
         # Merge remaining DataFrames
         for table_name, df in remaining_dfs.items():
             # Look for join keys without considering prefixes
-            join_key = None
-            possible_keys = [PATIENT_ID_COLUMN] + PATIENT_ID_ALTERNATIVES
-            
-            for key in possible_keys:
-                if key in result.columns and key in df.columns:
-                    join_key = key
-                    break
+            join_key = next((key for key in _PATIENT_ID_KEYS if key in result.columns and key in df.columns), None)
             
             if join_key is None:
                 logger.warning(f"No join key found for table {table_name}, columns: {df.columns.tolist()}")
@@ -128,7 +345,8 @@ class DataManager:
                 
             logger.info(f"Merging {table_name} using key: {join_key}")
             result = result.merge(df, how='left', on=join_key)
-            logger.debug(f"After merging {table_name}, columns: {result.columns.tolist()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("After merging %s, columns: %s", table_name, result.columns.tolist())
         
         return result
 
@@ -149,7 +367,7 @@ class DataManager:
         result = self._apply_query_to_dataframe(query, self._current_cohort)
         logger.debug(f"apply_query_on_current_cohort >> Result shape after applying query: {result.shape if result is not None else 'None'}")
         self._current_cohort = result
-        self._update_current_schema()
+        self._invalidate_current_schema()
         logger.debug(f"New cohort shape: {self._current_cohort.shape if self._current_cohort is not None else 'None'}")
 
     def _apply_query_to_dataframe(self, query: Query, df: pd.DataFrame) -> pd.DataFrame:
@@ -166,27 +384,62 @@ class DataManager:
             ValueError: If query is invalid or operation is not supported
         """
         try:
-            logger.debug(f"Entered _apply_query_to_dataframe with df shape {df.shape}")
-            # Simple query
-            if not query.is_complex:
-                logger.debug(f"Applying simple query: {query.to_human_readable()}")
-                result = self._apply_basic_query_to_dataframe(query, df)
-                logger.debug(f"Result shape after simple query: {result.shape if result is not None else 'None'}")
-                return result
-            # Complex query
-            else:
-                logger.debug(f"Applying complex query: {query.to_human_readable()}")
-                left_df = self._apply_query_to_dataframe(query.get_query1(), df)
-                right_df = self._apply_query_to_dataframe(query.get_query2(), df)
-                operation = query.get_operation().lower()
-                result = self._apply_operation_to_dataframes(left_df, right_df, operation)
-                logger.debug(f"Result shape after complex query: {result.shape if result is not None else 'None'}")
-                return result
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Entered _apply_query_to_dataframe with df shape %s", df.shape)
+                logger.debug("Applying %s query: %s", 'complex' if query.is_complex else 'simple', query.to_human_readable())
+            # The whole query tree is evaluated to one mask, so rows are only selected once.
+            # Cohorts are never modified in place, so a filter keeping every row shares the frame.
+            mask = self._build_query_mask(query, df)
+            result = df if mask.all() else df[mask]
+            logger.debug(f"Result shape after query: {result.shape}")
+            return result
         
         except Exception as e:
             logger.error(f"Error applying query: {e}")
             return False
 
+    def _build_query_mask(self, query: Query, df: pd.DataFrame) -> pd.Series:
+        """
+        Evaluate a simple or complex query to a boolean mask over the rows of df.
+        AND/OR nodes combine the masks of their sub-queries.
+        """
+        if not query.is_complex:
+            return self._build_basic_query_mask(query, df)
+            
+        operation = query.get_operation().lower()
+        if operation not in ('and', 'or'):
+            logger.error(f"Unsupported operation: {operation}")
+            raise ValueError(f"Unsupported operation: {operation}. Use 'and' or 'or'.")
+            
+        left_mask = self._build_query_mask(query.get_query1(), df)
+        right_query = query.get_query2()
+        
+        # Rows the left side does not decide: kept rows for AND, dropped rows for OR
+        undecided = left_mask if operation == 'and' else ~left_mask
+        undecided_count = int(undecided.sum())
+        if undecided_count == 0:
+            return left_mask
+        
+        if undecided_count > len(df) * _NARROWED_QUERY_MAX_FRACTION:
+            right_mask = self._build_query_mask(right_query, df)
+            return left_mask & right_mask if operation == 'and' else left_mask | right_mask
+        
+        # Few rows are left open, so the right side is only evaluated on those rows
+        # and on the columns it reads
+        fields = [field for field in dict.fromkeys(self._query_fields(right_query)) if field in df.columns]
+        right_mask = self._build_query_mask(right_query, df.loc[undecided, fields])
+        mask = left_mask.copy()
+        mask[undecided] = right_mask.to_numpy()
+        return mask
+
+    def _query_fields(self, query: Query) -> Iterator[str]:
+        """Yield the fields read by a simple or complex query."""
+        if query.is_complex:
+            yield from self._query_fields(query.get_query1())
+            yield from self._query_fields(query.get_query2())
+        else:
+            yield query.get_field()
+
     def _apply_basic_query_to_dataframe(self, query: Query, df: pd.DataFrame) -> pd.DataFrame:
         """
         Apply a simple query to a DataFrame.
@@ -203,63 +456,7 @@ class DataManager:
             ValueError: If query is complex or operation is not supported
         """
         try:
-            if query.is_complex:
-                raise ValueError("Expected simple query, got complex query")
-                
-            field = query.get_field()
-            operation = query.get_operation().lower()
-            value = query.get_value()
-            
-            logger.debug(f"Applying query: {field} {operation} {value}")
-            logger.debug(f"Input DataFrame shape: {df.shape}")
-            
-            # Verify field exists in DataFrame
-            if field not in df.columns:
-                raise ValueError(f"Field '{field}' not found in DataFrame")
-                
-            # Apply the appropriate operation
-            if operation == 'equals':
-                result = df[df[field] == value]
-                
-            elif operation == 'not_equals':
-                result = df[df[field] != value]
-                
-            elif operation == 'greater_than':
-                result = df[df[field] > value]
-                
-            elif operation == 'less_than':
-                result = df[df[field] < value]
-                
-            elif operation == 'greater_equal':
-                result = df[df[field] >= value]
-                
-            elif operation == 'less_equal':
-                result = df[df[field] <= value]
-                
-            elif operation == 'contains':
-                if not isinstance(value, str):
-                    raise ValueError("'contains' operation requires string value")
-                result = df[df[field].astype(str).str.contains(value, na=False)]
-                
-            elif operation == 'in':
-                if not isinstance(value, (list, tuple)):
-                    raise ValueError("'in' operation requires list or tuple value")
-                result = df[df[field].isin(value)]
-                
-            elif operation == 'between':
-                if not isinstance(value, (list, tuple)) or len(value) != 2:
-                    raise ValueError("'between' operation requires list/tuple of 2 values")
-                result = df[(df[field] >= value[0]) & (df[field] <= value[1])]
-                
-            elif operation == 'is_null':
-                result = df[df[field].isna()]
-                
-            elif operation == 'is_not_null':
-                result = df[df[field].notna()]
-                
-            else:
-                raise ValueError(f"Unsupported operation: {operation}")
-                
+            result = df[self._build_basic_query_mask(query, df)]
             logger.debug(f"Result DataFrame shape: {result.shape}")
             return result
             
@@ -267,64 +464,91 @@ class DataManager:
             logger.error(f"Error in _apply_basic_query_to_dataframe: {str(e)}")
             raise RuntimeError(f"Failed to apply query: {str(e)}")
 
-    def _apply_operation_to_dataframes(self, df1: pd.DataFrame, df2: pd.DataFrame, operation: str) -> pd.DataFrame:
+    def _build_basic_query_mask(self, query: Query, df: pd.DataFrame) -> pd.Series:
         """
-        Apply logical operation (AND/OR) between two DataFrames.
+        Evaluate a simple query to a boolean mask over the rows of df.
         
-        Args:
-            df1 (pd.DataFrame): First DataFrame
-            df2 (pd.DataFrame): Second DataFrame
-            operation (str): Logical operation ('and' or 'or')
+        Raises:
+            ValueError: If query is complex, the field is unknown or operation is not supported
+        """
+        if query.is_complex:
+            raise ValueError("Expected simple query, got complex query")
             
-        Returns:
-            pd.DataFrame: Result of applying the logical operation
+        field = query.get_field()
+        operation = query.get_operation().lower()
+        value = query.get_value()
+        
+        logger.debug(f"Applying query: {field} {operation} {value}")
+        logger.debug(f"Input DataFrame shape: {df.shape}")
+        
+        # Verify field exists in DataFrame
+        if field not in df.columns:
+            raise ValueError(f"Field '{field}' not found in DataFrame")
+        column = df[field]
             
-        Example:
-            If operation is 'and':
-                Returns rows that exist in both df1 AND df2
-            If operation is 'or':
-                Returns rows that exist in either df1 OR df2
-        """
-        try:
-            logger.debug(f"Applying {operation} operation between DataFrames")
-            logger.debug(f"DataFrame 1 shape: {df1.shape}")
-            logger.debug(f"DataFrame 2 shape: {df2.shape}")
-            
-            if operation.lower() == 'and':
-                # For AND, we want intersection of both DataFrames
-                # Keep only rows that exist in both DataFrames
-                result = pd.merge(df1, df2, how='inner')
-                
-            elif operation.lower() == 'or':
-                # For OR, we want union of both DataFrames
-                # Keep rows that exist in either DataFrame
-                result = pd.concat([df1, df2]).drop_duplicates()
-                
-            else:
-                logger.error(f"Unsupported operation: {operation}")
-                raise ValueError(f"Unsupported operation: {operation}. Use 'and' or 'or'.")
-                
-            logger.debug(f"Result DataFrame shape: {result.shape}")
-            return result
+        # Apply the appropriate operation
+        if operation == 'equals':
+            return column == value
             
-        except Exception as e:
-            logger.error(f"Error in _apply_operation: {str(e)}")
-            raise RuntimeError(f"Failed to apply operation: {str(e)}")
+        elif operation == 'not_equals':
+            return column != value
+            
+        elif operation == 'greater_than':
+            return column > value
+            
+        elif operation == 'less_than':
+            return column < value
+            
+        elif operation == 'greater_equal':
+            return column >= value
+            
+        elif operation == 'less_equal':
+            return column <= value
+            
+        elif operation == 'contains':
+            if not isinstance(value, str):
+                raise ValueError("'contains' operation requires string value")
+            # Arrow-backed string columns are searched directly; others are matched on their text
+            if not isinstance(column.dtype, pd.StringDtype):
+                column = column.astype(str)
+            return column.str.contains(value, na=False)
+            
+        elif operation == 'in':
+            if not isinstance(value, (list, tuple)):
+                raise ValueError("'in' operation requires list or tuple value")
+            return column.isin(value)
+            
+        elif operation == 'between':
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValueError("'between' operation requires list/tuple of 2 values")
+            return (column >= value[0]) & (column <= value[1])
+            
+        elif operation == 'is_null':
+            return column.isna()
+            
+        elif operation == 'is_not_null':
+            return column.notna()
+            
+        raise ValueError(f"Unsupported operation: {operation}")
 
     def _print_preview_df (self, df: pd.DataFrame, n: int = 5) -> None:
         """Print preview of DataFrame."""
-        logger.debug(f"Preview of DataFrame (first {n} rows):")
-        logger.debug(df.head(n))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Preview of DataFrame (first %d rows):", n)
+            logger.debug(df.head(n))
 
     def _update_full_schema(self):
         """Update schema for the full dataset."""
         if self._full_dataset is not None:
             self._full_schema = self._create_schema(self._full_dataset)
 
-    def _update_current_schema(self):
-        """Update schema for the current cohort."""
-        if self._current_cohort is not None:
-            self._current_schema = self._create_schema(self._current_cohort)
+    def _invalidate_current_schema(self):
+        """
+        Mark the current cohort schema as outdated. It is rebuilt on the next
+        get_current_schema() call, so chained queries do not scan every cohort.
+        """
+        self._current_schema = None
+        self._current_schema_text = None
 
     def get_full_schema(self) -> Dict[str, Dict]:
         """Get schema for the full dataset."""
@@ -332,6 +556,13 @@ class DataManager:
 
     def get_current_schema(self) -> Dict[str, Dict]:
         """Get schema for the current cohort."""
+        if self._current_schema is None:
+            if self._current_cohort is None:
+                return {}
+            if self._current_cohort is self._full_dataset:
+                self._current_schema = self._full_schema
+            else:
+                self._current_schema = self._create_schema(self._current_cohort)
         return self._current_schema
 
     def get_current_cohort(self) -> Optional[pd.DataFrame]:
@@ -341,24 +572,38 @@ class DataManager:
     def reset_to_full(self):
         """Reset the current cohort to include all data."""
         logger.info("Resetting cohort to full dataset")
-        self._current_cohort = self._full_dataset.copy()
-        self._update_current_schema()
+        self._current_cohort = self._full_dataset
+        self._invalidate_current_schema()
         return self._current_cohort
 
-    def _save_current_data(self, path: str, name: str) -> None:
+    def _save_current_data(self, path: str, name: str, file_format: str = "csv") -> None:
         """
-        Helper method to save the current cohort data to a CSV file.
+        Helper method to save the current cohort data to a CSV or Parquet file.
         
         Args:
             path (str): Directory path where the file will be saved
             name (str): Base name for the file (without extension)
+            file_format (str): "csv" or "parquet". Parquet needs pyarrow.
         """
         if self._current_cohort is None:
             raise ValueError("No cohort is currently loaded")
+        if file_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported file format: {file_format}. Use 'csv' or 'parquet'.")
             
-        file_path = os.path.join(path, f"{name}.csv")
+        file_path = os.path.join(path, f"{name}.{file_format}")
         os.makedirs(path, exist_ok=True)
-        self._current_cohort.to_csv(file_path, index=False)
+        if file_format == "parquet":
+            # Compressed and columnar: much smaller than CSV, and readers can load single columns
+            self._current_cohort.to_parquet(file_path, engine="pyarrow", compression="zstd", index=False)
+        elif pa is not None:
+            # Arrow's CSV writer is many times faster than to_csv's row-by-row formatting.
+            # The output differs from to_csv: the header and every string cell are quoted,
+            # and whole floats lose their ".0" (1.0 -> 1), so files are somewhat larger.
+            # pandas reads them back to the same frame.
+            table = pa.Table.from_pandas(self._current_cohort, preserve_index=False)
+            pa_csv.write_csv(table, file_path, write_options=pa_csv.WriteOptions(quoting_style="needed"))
+        else:
+            self._current_cohort.to_csv(file_path, index=False)
 
     def _save_current_schema(self, path: str, name: str) -> None:
         """
@@ -375,17 +620,17 @@ class DataManager:
         os.makedirs(path, exist_ok=True)
         
         # Get formatted schema using existing method
-        formatted_schema = self._format_schema_to_string(self._current_schema)
+        formatted_schema = self.get_readable_schema_current_cohort()
                
         # Write formatted schema to file
         with open(schema_path, 'w', encoding='utf-8') as f:
             f.write(formatted_schema)
             
-        logger.info(f"Saved current schema with {len(self._current_schema)} columns")
+        logger.info(f"Saved current schema with {len(self.get_current_schema())} columns")
 
 
     def save_current_cohort(self, path: str = "root/data/temp/data_manager_output", 
-                        name: str = "test") -> None:
+                        name: str = "test", file_format: str = "csv") -> None:
         """
         Save the current cohort data and its schema to separate files.
         
@@ -394,12 +639,14 @@ class DataManager:
                     Defaults to "root/data/temp/data_manager_output"
             name (str): Base name for the files (without extension). 
                     Defaults to "test"
+            file_format (str): Format of the data file, "csv" or "parquet".
+                    Defaults to "csv", which users can open in a spreadsheet
         """
         # Normalize path separators for cross-platform compatibility
         path = os.path.normpath(path)
         
         # Save both data and schema
-        self._save_current_data(path, name)
+        self._save_current_data(path, name, file_format)
         self._save_current_schema(path, name)
 
     def validate_visualization_request(self, request: VisualizerRequest) -> bool:
@@ -465,15 +712,15 @@ class DataManager:
                 return False
 
             # Additional validation based on data types
-            schema = self._current_schema
+            schema = self.get_current_schema()
             
             # Validate numeric columns for applicable chart types
             if request.chart_type in [ChartType.BOX, ChartType.HISTOGRAM, ChartType.SCATTER]:
-                if request.x_column and 'float' not in schema[request.x_column]['dtype'] and 'int' not in schema[request.x_column]['dtype']:
+                if request.x_column and not schema[request.x_column]['is_numeric']:
                     logger.error(f"Column {request.x_column} must be numeric for {request.chart_type.value} chart")
                     return False
                     
-                if request.y_column and 'float' not in schema[request.y_column]['dtype'] and 'int' not in schema[request.y_column]['dtype']:
+                if request.y_column and not schema[request.y_column]['is_numeric']:
                     logger.error(f"Column {request.y_column} must be numeric for {request.chart_type.value} chart")
                     return False
             
@@ -493,7 +740,10 @@ class DataManager:
         if self._current_cohort is None:
             return "No current cohort available"
 
-        return self._format_schema_to_string(self._current_schema)
+        # The schema only changes when the cohort does, so reuse the text between LLM turns
+        if self._current_schema_text is None:
+            self._current_schema_text = self._format_schema_to_string(self.get_current_schema())
+        return self._current_schema_text
     
     def get_readable_schema_full_dataset(self) -> str:
         """
@@ -514,12 +764,17 @@ class DataManager:
         # Get original source tables from column prefixes
         source_tables = sorted(set(col.split('.')[0] for col in df.columns if '.' in col))
         
-        # Look for patient ID column
-        patient_id_col = next((col for col in [PATIENT_ID_COLUMN] + PATIENT_ID_ALTERNATIVES 
-                             if col in df.columns), None)
+        # Column statistics are computed for the whole frame at once instead of
+        # scanning each column separately for every statistic
+        total_rows = len(df)
+        missing_counts = df.isna().sum()
+        unique_counts = df.nunique()
+        numeric_columns = [column for column in df.columns if _is_numeric_column(df[column])]
+        numeric_column_set = set(numeric_columns)
+        numeric_stats = df[numeric_columns].agg(['min', 'max', 'mean']) if numeric_columns else None
         
         # Count unique patients if we found the ID column
-        unique_patients = df[patient_id_col].nunique() if patient_id_col else None
+        unique_patients = int(unique_counts[self._patient_id_col]) if self._patient_id_col else None
         
         schema = {
             '_database_info': {
@@ -535,36 +790,33 @@ class DataManager:
         for column in df.columns:
             column_info = {
                 'dtype': str(df[column].dtype),
-                'unique_values': df[column].nunique(),
-                'missing_values': df[column].isnull().sum(),
-                'total_rows': len(df)
+                'unique_values': int(unique_counts[column]),
+                'missing_values': int(missing_counts[column]),
+                'total_rows': total_rows,
+                'is_numeric': column in numeric_column_set
             }
             
             # Add numeric statistics for numeric columns
-            if np.issubdtype(df[column].dtype, np.number):
+            if column_info['is_numeric']:
+                all_missing = missing_counts[column] == total_rows
                 column_info.update({
-                    'min': float(df[column].min()) if not df[column].isna().all() else None,
-                    'max': float(df[column].max()) if not df[column].isna().all() else None,
-                    'mean': float(df[column].mean()) if not df[column].isna().all() else None
+                    stat: None if all_missing else float(numeric_stats.at[stat, column])
+                    for stat in ('min', 'max', 'mean')
                 })
                 
             # Add value distribution for columns with few unique values
-            if 1 < df[column].nunique() <= UNIQUE_VALUES_THRESHOLD:
+            if 1 < unique_counts[column] <= UNIQUE_VALUES_THRESHOLD:
                 value_counts = df[column].value_counts()
-                total_non_null = value_counts.sum()
-                
-                distribution = []
-                for value, count in value_counts.items():
-                    percentage = (count / total_non_null) * 100
-                    # Handle different types of values (including numpy types)
-                    cleaned_value = str(value.item() if hasattr(value, 'item') else value)
-                    distribution.append({
-                        'value': cleaned_value,
-                        'count': int(count),
-                        'percentage': round(float(percentage), 2)
-                    })
+                counts = value_counts.to_numpy()
+                percentages = (counts / counts.sum()) * 100
                 
-                column_info['value_distribution'] = distribution
+                # tolist() turns numpy values into plain Python ones for the output
+                column_info['value_distribution'] = [
+                    {'value': str(value), 'count': count, 'percentage': round(percentage, 2)}
+                    for value, count, percentage in zip(
+                        value_counts.index.tolist(), counts.tolist(), percentages.tolist()
+                    )
+                ]
             
             schema[column] = column_info
         
@@ -583,24 +835,27 @@ class DataManager:
         if not schema:
             return "Empty schema"
             
-        formatted_lines = []
-        
+        return "\n".join(self._iter_schema_lines(schema))
+
+    def _iter_schema_lines(self, schema: Dict[str, Dict]) -> Iterator[str]:
+        """
+        Yield the lines of the readable schema, in order. The caller joins them;
+        str.join collects the lines into a list first, so this does not save memory.
+        """
         # Database-level information
         if '_database_info' in schema:
             db_info = schema['_database_info']
-            formatted_lines.extend([
-                "DATABASE INFORMATION",
-                "=" * 50,
-                f"Total Rows: {db_info['total_rows']}",
-                f"Unique Patients: {db_info['unique_patients']}",
-                f"Total Columns: {db_info['total_columns']}",
-                f"Original Source Tables: {', '.join(db_info['source_tables'])}",
-                f"Schema Generated: {db_info['timestamp']}",
-                "",
-                "COLUMN DETAILS",
-                "=" * 50,
-                ""
-            ])
+            yield "DATABASE INFORMATION"
+            yield "=" * 50
+            yield f"Total Rows: {db_info['total_rows']}"
+            yield f"Unique Patients: {db_info['unique_patients']}"
+            yield f"Total Columns: {db_info['total_columns']}"
+            yield f"Original Source Tables: {', '.join(db_info['source_tables'])}"
+            yield f"Schema Generated: {db_info['timestamp']}"
+            yield ""
+            yield "COLUMN DETAILS"
+            yield "=" * 50
+            yield ""
         
         # Column-level information
         for column, info in sorted(schema.items()):
@@ -608,13 +863,13 @@ class DataManager:
                 continue
                 
             # Basic column information
-            formatted_lines.append(f"Column: {column}")
-            formatted_lines.append(f"- Type: {info['dtype']}")
-            formatted_lines.append(f"- Unique Values: {info['unique_values']}")
+            yield f"Column: {column}"
+            yield f"- Type: {info['dtype']}"
+            yield f"- Unique Values: {info['unique_values']}"
             
             # Missing values information
             missing_percentage = (info['missing_values'] / info['total_rows']) * 100
-            formatted_lines.append(
+            yield (
                 f"- Missing Values: {info['missing_values']} of {info['total_rows']} "
                 f"({missing_percentage:.2f}%)"
             )
@@ -622,22 +877,19 @@ class DataManager:
             # Numeric statistics if available
             if all(key in info for key in ['min', 'max', 'mean']):
                 if info['min'] is not None:  # Check if numeric stats exist
-                    formatted_lines.extend([
-                        f"- Minimum: {info['min']}",
-                        f"- Maximum: {info['max']}",
-                        f"- Mean: {info['mean']:.2f}"
-                    ])
+                    yield f"- Minimum: {info['min']}"
+                    yield f"- Maximum: {info['max']}"
+                    yield f"- Mean: {info['mean']:.2f}"
                 
             # Value distribution if available
             if 'value_distribution' in info:
-                formatted_lines.append("- Value Distribution:")
+                yield "- Value Distribution:"
                 for dist in info['value_distribution']:
-                    formatted_lines.append(
+                    yield (
                         f"  • {dist['value']}: {dist['count']} occurrences "
                         f"({dist['percentage']}%)"
                     )
             
             # Add blank line between columns
-            formatted_lines.append("")
-        
-        return "\n".join(formatted_lines)
+            yield ""
+
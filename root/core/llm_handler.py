@@ -24,8 +24,14 @@ class LLMHandler:
 
     def _load_prompt(self, filename: str) -> str:
         """Load prompt from file"""
-        with open(self.prompts_dir / filename, 'r', encoding='utf-8') as f:
-            return f.read().strip()
+        # Prompts are re-read on every request, so skip the buffered text-IO layers
+        fd = os.open(self.prompts_dir / filename, os.O_RDONLY)
+        try:
+            data = os.read(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        # Match text-mode newline handling for prompts checked out with CRLF endings
+        return data.decode('utf-8').replace('\r\n', '\n').strip()
 
     def _format_schema(self, schema: dict) -> str:
         """Format schema into a readable string"""
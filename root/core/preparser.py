@@ -126,7 +126,8 @@ class Preparser:
         try:
             Path(filepath).parent.mkdir(parents=True, exist_ok=True)
             with open(filepath, 'wb') as f:
-                pickle.dump(cache_data, f)
+                # Cached values are Intention objects, so keep pickle but use its fastest binary protocol
+                pickle.dump(cache_data, f, protocol=pickle.HIGHEST_PROTOCOL)
             logger.info(f"Cache saved successfully to {filepath}")
             
         except Exception as e:
@@ -98,7 +98,7 @@ class ResultAnalyzer:
             
             categorical_cols = [
                 col for col, info in schema.items()
-                if 'object' in info['dtype'] and info['unique_values'] < 10
+                if info['dtype'] in ('object', 'str') and info['unique_values'] < 10
             ]
             
             if not numeric_cols or not categorical_cols:
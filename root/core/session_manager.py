@@ -87,8 +87,9 @@ class SessionManager:
         """
         if not all(self._validate_message(msg, "system") for msg in system_messages):
             raise ValueError("Invalid system message format")
+        # System messages lead the conversation; swap them without touching the exchanges
+        self._full_conversation[:len(self._system_messages)] = system_messages
         self._system_messages = system_messages.copy()
-        self._update_full_conversation()
 
     def get_last_request(self) -> str:
         """
@@ -110,7 +111,7 @@ class SessionManager:
         """        
         user_msg = {"role": "user", "content": user_message}
         self._user_messages.append(user_msg)
-        self._update_full_conversation()
+        self._full_conversation.append(user_msg)
 
     def add_llm_response(self, llm_response: str) -> None:
         """
@@ -119,9 +120,9 @@ class SessionManager:
         Args:
             user_message: The content of user's message
         """
-        llm_msg = {"role": "user", "content": llm_response}
+        llm_msg = {"role": "assistant", "content": llm_response}
         self._llm_responses.append(llm_msg)
-        self._update_full_conversation()
+        self._full_conversation.append(llm_msg)
 
     def add_exchange(self, user_message: str, llm_response: str) -> None:
         """
@@ -136,23 +137,8 @@ class SessionManager:
 
         self._user_messages.append(user_msg)
         self._llm_responses.append(llm_msg)
-        self._update_full_conversation()
-
-    def _update_full_conversation(self) -> None:
-        """Update the full conversation list with all messages in order."""
-        conversation = self._system_messages.copy()
-        
-        # Add complete exchanges (user + llm pairs)
-        complete_exchanges = min(len(self._user_messages), len(self._llm_responses))
-        for i in range(complete_exchanges):
-            conversation.append(self._user_messages[i])
-            conversation.append(self._llm_responses[i])
-        
-        # Add any remaining user message without response
-        if len(self._user_messages) > len(self._llm_responses):
-            conversation.append(self._user_messages[-1])
-        
-        self._full_conversation = conversation
+        self._full_conversation.append(user_msg)
+        self._full_conversation.append(llm_msg)
 
     @staticmethod
     def _validate_message(message: Dict[str, str], expected_role: str) -> bool:
@@ -172,7 +158,7 @@ class SessionManager:
         """Clear conversation history but keep system messages."""
         self._user_messages.clear()
         self._llm_responses.clear()
-        self._update_full_conversation()
+        self._full_conversation = self._system_messages.copy()
 
     def clear_all(self) -> None:
         """Clear all messages including system messages."""
@@ -195,7 +181,17 @@ class SessionManager:
         """
         if include_system:
             return self._full_conversation.copy()
-        return [msg for msg in self._full_conversation if msg["role"] != "system"]
+        # System messages always lead the conversation, so the rest is a plain slice
+        return self._full_conversation[len(self._system_messages):]
+
+    def get_messages_view(self) -> List[Dict[str, str]]:
+        """
+        Get all messages, including system messages, without copying them.
+
+        The returned list is owned by the SessionManager and must not be modified.
+        Use get_messages() when an independent list is needed.
+        """
+        return self._full_conversation
 
     def get_last_n_exchanges(self, n: int, include_system: bool = True) -> List[Dict[str, str]]:
         """
@@ -211,12 +207,15 @@ class SessionManager:
         if n <= 0:
             return []
 
-        messages = self.get_messages(include_system=include_system)
+        # Slice only the tail instead of copying the whole conversation first.
+        # System messages always lead the conversation, so the tail never starts before them.
+        system_count = len(self._system_messages)
+        start = max(system_count, len(self._full_conversation) - 2*n)  # Each exchange has 2 messages
+        tail = self._full_conversation[start:]
         if not include_system:
-            return messages[-2*n:]  # Each exchange has 2 messages
+            return tail
         
-        system_count = len(self._system_messages)
-        return self._system_messages + messages[system_count:][-2*n:]
+        return self._system_messages + tail
 
     def __len__(self) -> int:
         """Return the number of exchanges (excluding system messages)."""
@@ -1,9 +1,7 @@
 # interface/cli.py
 import cmd
-import asyncio
-import os
 from utils.logger import logger
-from utils.config import CLI_PROMPT, CLI_INTRO
+from utils.config import CLI_PROMPT, CLI_INTRO, TESTS_DIR
 
 class HealthcareCLI(cmd.Cmd):
     intro = CLI_INTRO
@@ -13,7 +11,7 @@ class HealthcareCLI(cmd.Cmd):
         super().__init__()
         logger.info("Initializing CLI interface")
         self.app = application  # Store reference to application
-        self.tests_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tests')
+        self.tests_dir = str(TESTS_DIR)
 
     def do_exit(self, arg):
         """Exit the application."""
@@ -87,9 +85,10 @@ class HealthcareCLI(cmd.Cmd):
     def default(self, line):
         """Handle any input that isn't a specific command as a query to the chatbot."""
         try:
-            # Now passing both required parameters
-            result = asyncio.run(self.app.process_user_input(line, filter_current_cohort=False))
-            print(result)
+            # process_user_input is synchronous; wrapping it in asyncio.run only raised a ValueError
+            result = self.app.process_user_input(line, filter_current_cohort=False)
+            if result is not None:
+                print(result)
         except Exception as e:
             print(f"Error: {e}")
 
@@ -0,0 +1,97 @@
+# tests/test_action_manager.py
+import json
+
+import pytest
+import core.action_manager as action_manager_module
+from core.action_manager import ActionManager
+
+def _decoding_manager() -> ActionManager:
+    """ActionManager with only its decoding state, so no LLM client or GUI is needed"""
+    manager = ActionManager.__new__(ActionManager)
+    manager.actions = []
+    return manager
+
+@pytest.fixture
+def action_manager():
+    return _decoding_manager()
+
+def test_oversized_response_rejected(action_manager, monkeypatch):
+    """The size limit counts encoded bytes, not characters"""
+    payload = json.dumps([{"type": "print_message", "parameters": {"message": "ñ" * 40}}], ensure_ascii=False)
+    monkeypatch.setattr(action_manager_module, 'LLM_RESPONSE_MAX_BYTES', len(payload) + 10)
+    
+    # Fewer characters than the limit, but each "ñ" takes two bytes in UTF-8
+    assert len(payload) <= action_manager_module.LLM_RESPONSE_MAX_BYTES
+    assert not action_manager.decode_llm_response(payload)
+    assert action_manager.actions == []
+    
+    monkeypatch.setattr(action_manager_module, 'LLM_RESPONSE_MAX_BYTES', len(payload.encode('utf-8')))
+    assert action_manager.decode_llm_response(payload)
+    assert len(action_manager.actions) == 1
+
+def test_repeated_decodes_return_independent_parameters(action_manager):
+    """Mutating decoded actions does not leak into a later decode of the same response"""
+    payload = json.dumps([{
+        "type": "create_visualization",
+        "parameters": {"request": {"chart_type": "histogram", "columns": ["pacientes.Edad"]}}
+    }])
+    assert action_manager.decode_llm_response(payload)
+    first = action_manager.actions[:]
+    first[0].parameters["request"]["columns"].append("pacientes.Genero")
+    first[0].parameters["extra"] = True
+    
+    assert action_manager.decode_llm_response(payload)
+    second = action_manager.actions
+    assert second[0].parameters == {"request": {"chart_type": "histogram", "columns": ["pacientes.Edad"]}}
+
+DECODE_PAYLOADS = [
+    # Valid
+    '[{"type": "print_message", "parameters": {"message": "Hola"}}]',
+    '[{"type": "print_message", "parameters": {"message": "Hola"}, "note": "x"}]',
+    '[{"type": "name_cohort", "parameters": {"name": "Diabéticos"}},'
+    ' {"type": "save_cohort", "parameters": {"name": "diabeticos"}}]',
+    '[{"type": "create_visualization", "parameters": {"request": {"chart_type": "pie", "columns": ["a"]}}}]',
+    '[{"type": "suggestion", "parameters": {"message": "¿Filtrar?", "prompt": "filtra por edad"}}]',
+    'Texto previo [{"type": "print_message", "parameters": {"message": "ok"}}] texto posterior',
+    '[]',
+    # Invalid
+    '[{"type": "unknown", "parameters": {}}]',
+    '[{"type": "show_statistics", "parameters": {}}]',
+    '[{"type": "print_message"}]',
+    '[{"type": "print_message", "parameters": {"message": 5}}]',
+    '[{"type": "print_message", "parameters": {"message": true}}]',
+    '[{"type": "print_message", "parameters": "Hola"}]',
+    '[{"type": "create_visualization", "parameters": {"request": ["pie"]}}]',
+    '[{"type": "suggestion", "parameters": {"message": "Hola"}}]',
+    '[{"type": 3, "parameters": {"message": "Hola"}}]',
+    '[{"parameters": {"message": "Hola"}}]',
+    '["print_message"]',
+    '[{"type": "print_message", "parameters": {"message": "ok"}}, {"type": "bad"}]',
+    '[{"type": "print_message", "parameters": {"message": "ok"}',
+    'sin json',
+]
+
+@pytest.mark.parametrize('payload', DECODE_PAYLOADS)
+def test_schema_and_validator_decoding_agree(payload, monkeypatch):
+    """The msgspec schema path accepts, rejects and returns exactly what the validators do"""
+    if action_manager_module._ACTION_DECODER is None:
+        pytest.skip("msgspec is not installed")
+    
+    def decode(use_schema):
+        manager = _decoding_manager()
+        with monkeypatch.context() as m:
+            if not use_schema:
+                m.setattr(action_manager_module, '_ACTION_DECODER', None)
+            success = manager.decode_llm_response(payload)
+        return success, [(a.type, a.parameters) for a in manager.actions]
+    
+    assert decode(use_schema=True) == decode(use_schema=False)
+
+def test_schema_decoding_drops_undeclared_parameters(action_manager):
+    """Only the parameters declared in the msgspec schema reach the action handlers"""
+    if action_manager_module._ACTION_DECODER is None:
+        pytest.skip("msgspec is not installed")
+    
+    payload = '[{"type": "print_message", "parameters": {"message": "Hola", "level": "info"}}]'
+    assert action_manager.decode_llm_response(payload)
+    assert action_manager.actions[0].parameters == {"message": "Hola"}
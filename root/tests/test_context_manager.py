@@ -110,3 +110,28 @@ def test_get_messages_without_system(context, system_messages):
     assert all(msg["role"] != "system" for msg in messages)
     assert messages[0]["role"] == "user"
     assert messages[1]["role"] == "assistant"
+
+def test_get_messages_view(context, system_messages):
+    """Test that the message view matches the copied message list"""
+    context.set_system_messages(system_messages)
+    context.add_exchange("User message", "LLM response")
+    
+    view = context.get_messages_view()
+    assert view == context.get_messages()
+    assert len(view) == 4
+
+def test_messages_kept_in_arrival_order(context, system_messages):
+    """Test that separately added messages keep their order and roles"""
+    context.add_user_message("Message 1")
+    context.add_llm_response("Response 1")
+    context.add_user_message("Message 2")
+    context.set_system_messages(system_messages)
+    
+    messages = context.get_messages()
+    assert [msg["content"] for msg in messages] == [
+        "System message 1", "System message 2", "Message 1", "Response 1", "Message 2"
+    ]
+    assert [msg["role"] for msg in messages[2:]] == ["user", "assistant", "user"]
+    
+    context.set_system_messages(system_messages[:1])
+    assert context.get_messages()[:2] == [system_messages[0], messages[2]]
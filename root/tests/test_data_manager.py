@@ -31,6 +31,154 @@ def test_simple_query_equals(data_manager):
     assert len(result) > 0
     assert all(result['gender'] == 'F')
 
+def test_csv_cache_reused_and_invalidated(tmp_path):
+    """Parsed CSVs and the merged dataset are cached and refreshed when a file changes"""
+    pd.DataFrame({'PacienteID': [1, 2], 'Edad': [40, 50]}).to_csv(tmp_path / 'pacientes.csv', index=False)
+    pd.DataFrame({'PacienteID': [1, 2], 'Descripcion': ['a', 'b']}).to_csv(tmp_path / 'condiciones.csv', index=False)
+    
+    first = DataManager(str(tmp_path))
+    cache_dir = tmp_path / '.cache'
+    assert len(list(cache_dir.iterdir())) == 3
+    assert len(list(cache_dir.glob('merged-*'))) == 1
+    
+    second = DataManager(str(tmp_path))
+    pd.testing.assert_frame_equal(first.get_current_cohort(), second.get_current_cohort())
+    
+    # Rewriting a CSV replaces its cache entries instead of serving stale data
+    pd.DataFrame({'PacienteID': [1, 2, 3], 'Edad': [40, 50, 60]}).to_csv(tmp_path / 'pacientes.csv', index=False)
+    third = DataManager(str(tmp_path))
+    assert len(third.get_current_cohort()) == 3
+    assert len(list(cache_dir.glob('pacientes-*'))) == 1
+    assert len(list(cache_dir.glob('merged-*'))) == 1
+    assert len(list(cache_dir.iterdir())) == 3
+
+def test_failed_cache_write_leaves_no_entry(tmp_path):
+    """A cache write that fails part-way leaves neither the entry nor its temporary file"""
+    pd.DataFrame({'PacienteID': [1, 2], 'Edad': [40, 50]}).to_csv(tmp_path / 'pacientes.csv', index=False)
+    data_manager = DataManager(str(tmp_path))
+    cache_dir = tmp_path / '.cache'
+    before = set(cache_dir.iterdir())
+    
+    unserialisable = pd.DataFrame({'value': [lambda: None]})
+    for suffix in ('.pkl', '.arrow'):
+        cache_file = cache_dir / f'broken{suffix}'
+        with pytest.raises(Exception):
+            data_manager._write_cache_file(unserialisable, str(cache_file))
+        assert not cache_file.exists()
+    assert set(cache_dir.iterdir()) == before
+
+def test_complex_query_combines_rows_by_index(tmp_path):
+    """AND/OR keep distinct rows even when their values are identical"""
+    pd.DataFrame({'PacienteID': [1, 1, 3, 4], 'Edad': [40, 40, 70, 20]}).to_csv(tmp_path / 'pacientes.csv', index=False)
+    data_manager = DataManager(str(tmp_path))
+    df = data_manager.get_current_cohort()
+    old = {'field': 'pacientes.Edad', 'operation': 'greater_than', 'value': 30}
+    young = {'field': 'pacientes.Edad', 'operation': 'less_than', 'value': 50}
+    
+    result = data_manager._apply_query_to_dataframe(Query.create_complex('and', old, young), df)
+    assert result['PacienteID'].tolist() == [1, 1]
+    
+    result = data_manager._apply_query_to_dataframe(Query.create_complex('or', old, young), df)
+    assert sorted(result['PacienteID'].tolist()) == [1, 1, 3, 4]
+
+
+def test_current_schema_follows_cohort(tmp_path):
+    """The current schema is rebuilt for the filtered cohort when it is requested"""
+    pd.DataFrame({'PacienteID': [1, 2, 3], 'Edad': [40, 50, 70]}).to_csv(tmp_path / 'pacientes.csv', index=False)
+    data_manager = DataManager(str(tmp_path))
+    assert data_manager.get_current_schema()['_database_info']['total_rows'] == 3
+    
+    data_manager.apply_query_on_current_cohort(Query.create_from_dict(
+        {'field': 'pacientes.Edad', 'operation': 'greater_than', 'value': 45}))
+    assert data_manager.get_current_schema()['_database_info']['total_rows'] == 2
+    assert data_manager.get_current_schema()['pacientes.Edad']['min'] == 50.0
+    assert data_manager.get_current_schema()['pacientes.Edad']['is_numeric']
+    
+    data_manager.reset_to_full()
+    assert data_manager.get_current_schema()['_database_info']['total_rows'] == 3
+
+def test_text_filters_skip_missing_values(tmp_path):
+    """Text filters match substrings and treat missing values as non-matching"""
+    (tmp_path / 'condiciones.csv').write_text(
+        'PacienteID,Descripcion,Fecha_inicio\n'
+        '1,Asma,2023-11-21 10:18:27.267949\n'
+        '2,,2023-12-03 10:18:27.267949\n'
+        '3,Asma bronquial,\n'
+    )
+    data_manager = DataManager(str(tmp_path))
+    df = data_manager.get_current_cohort()
+    assert df['condiciones.Fecha_inicio'].iloc[0] == '2023-11-21 10:18:27.267949'
+    
+    contains = Query.create_from_dict({'field': 'condiciones.Descripcion', 'operation': 'contains', 'value': 'Asma'})
+    assert data_manager._apply_query_to_dataframe(contains, df)['PacienteID'].tolist() == [1, 3]
+    not_equals = Query.create_from_dict({'field': 'condiciones.Descripcion', 'operation': 'not_equals', 'value': 'Asma'})
+    assert data_manager._apply_query_to_dataframe(not_equals, df)['PacienteID'].tolist() == [2, 3]
+
+def test_save_current_cohort_as_parquet(tmp_path):
+    """Cohorts saved as Parquet read back with the same values"""
+    pytest.importorskip('pyarrow')
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    pd.DataFrame({'PacienteID': [1, 2], 'Genero': ['F', None]}).to_csv(data_dir / 'pacientes.csv', index=False)
+    data_manager = DataManager(str(data_dir))
+    
+    data_manager.save_current_cohort(str(tmp_path / 'out'), 'cohort', file_format='parquet')
+    saved = pd.read_parquet(tmp_path / 'out' / 'cohort.parquet')
+    assert saved['PacienteID'].tolist() == [1, 2]
+    assert saved['pacientes.Genero'].iloc[0] == 'F'
+    assert saved['pacientes.Genero'].isna().iloc[1]
+    assert (tmp_path / 'out' / 'cohort_schema.txt').exists()
+
+def test_complex_query_narrowed_to_undecided_rows(tmp_path):
+    """The right side of AND/OR gives the same rows when only undecided rows are evaluated"""
+    ages = list(range(20))
+    pd.DataFrame({
+        'PacienteID': range(20), 'Edad': ages, 'Genero': ['F', 'M'] * 10
+    }).to_csv(tmp_path / 'pacientes.csv', index=False)
+    data_manager = DataManager(str(tmp_path))
+    df = data_manager.get_current_cohort()
+    young = {'field': 'pacientes.Edad', 'operation': 'less_than', 'value': 4}
+    old = {'field': 'pacientes.Edad', 'operation': 'greater_than', 'value': 3}
+    female = {'field': 'pacientes.Genero', 'operation': 'equals', 'value': 'F'}
+    
+    result = data_manager._apply_query_to_dataframe(Query.create_complex('and', young, female), df)
+    assert result['PacienteID'].tolist() == [0, 2]
+    
+    result = data_manager._apply_query_to_dataframe(Query.create_complex('or', old, female), df)
+    assert result['PacienteID'].tolist() == [0, 2] + list(range(4, 20))
+
+
+def test_filter_keeping_all_rows_shares_cohort(tmp_path):
+    """A filter that keeps every row does not copy the cohort"""
+    pd.DataFrame({'PacienteID': [1, 2], 'Edad': [40, 50]}).to_csv(tmp_path / 'pacientes.csv', index=False)
+    data_manager = DataManager(str(tmp_path))
+    full = data_manager.get_current_cohort()
+    
+    data_manager.apply_query_on_current_cohort(Query.create_from_dict(
+        {'field': 'pacientes.Edad', 'operation': 'is_not_null', 'value': None}))
+    assert data_manager.get_current_cohort() is full
+    
+    data_manager.apply_query_on_current_cohort(Query.create_from_dict(
+        {'field': 'pacientes.Edad', 'operation': 'greater_than', 'value': 45}))
+    assert data_manager.get_current_cohort()['PacienteID'].tolist() == [2]
+
+
+def test_save_current_cohort_as_csv(tmp_path):
+    """Cohorts saved as CSV read back with the same values"""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    pd.DataFrame({
+        'PacienteID': [1, 2], 'Descripcion': ['Asma, leve', None], 'Codigo': [430193006.0, 91930004.0]
+    }).to_csv(data_dir / 'condiciones.csv', index=False)
+    data_manager = DataManager(str(data_dir))
+    
+    data_manager.save_current_cohort(str(tmp_path / 'out'), 'cohort')
+    saved = pd.read_csv(tmp_path / 'out' / 'cohort.csv')
+    assert saved['PacienteID'].tolist() == [1, 2]
+    assert saved['condiciones.Descripcion'].iloc[0] == 'Asma, leve'
+    assert saved['condiciones.Descripcion'].isna().iloc[1]
+    assert saved['condiciones.Codigo'].tolist() == [430193006.0, 91930004.0]
+
 
 if __name__ == '__main__':
     pytest.main([__file__])
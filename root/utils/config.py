@@ -12,6 +12,9 @@ DATA_DIR = PROJECT_ROOT / 'data' / 'newData'
 # DATA_DIR = PROJECT_ROOT / 'data'
 LOGS_DIR = PROJECT_ROOT / 'logs'
 TESTS_DIR = PROJECT_ROOT / 'tests'
+PREPARSER_CACHE_FILE = PROJECT_ROOT / 'data' / 'cache.json'
+CSV_CACHE_DIRNAME = '.cache'  # Parsed CSV tables are cached in this subdirectory of the data directory
+CSV_READ_WORKERS = 8  # Maximum number of CSV files parsed concurrently
 
 PATIENT_ID_COLUMN = 'PacienteID'
 PATIENT_ID_ALTERNATIVES = ['Patient ID', 'pacientes.ID', 'paciente_id', 'ID']  # Fallback column names
@@ -38,9 +41,11 @@ LOG_FILE_PATTERN = "app_{date}.log"
 # CLI Configuration
 CLI_PROMPT = "(Master Branch Bot) "
 CLI_INTRO = "Welcome to the Healthcare Data Analysis System. Type 'help' for commands."
+TEXT_OUTPUT_MAX_BYTES = 1 << 20  # Largest text file printed by Application.text_file_output
 
 # Query Processing
 MAX_CACHE_SIZE = 1000  # Maximum number of cached queries
+LLM_RESPONSE_MAX_BYTES = 1 << 20  # Larger LLM action responses are rejected before parsing
 
 # Schema configuration
 UNIQUE_VALUES_THRESHOLD = 30  # Show all possible values if number of unique values is below this